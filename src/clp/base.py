@@ -1,4 +1,196 @@
-from copy import deepcopy
+import numpy as np
+from numba import njit, prange
+
+# Packed corners hold (x, y, z) in 21-bit lanes: 20 value bits plus a guard bit, so every
+# coordinate must lie in [0, _COORD_LIMIT), as FreeSpace checks. A lane-wise a >= b is then a
+# single subtraction.
+_COORD_LIMIT = 1 << 20
+_GUARD = np.uint64((1 << 62) | (1 << 41) | (1 << 20))
+_LANE_ONES = np.uint64((1 << 42) | (1 << 21) | 1)
+
+
+def _pack(x, y, z):
+    """Packs corners into words with one 21-bit lane per axis. Works on ints and uint64 arrays."""
+    return (x << 42) | (y << 21) | z
+
+
+@njit(cache=True)
+def _subtract_kernel(sxmin, sxmax, symin, symax, szmin, szmax,
+                     axmin, axmax, aymin, aymax, azmin, azmax, vertical_stability, out):
+    """
+    Writes the cuboids left after subtracting an AABB from a space into `out`.
+
+    Each row of `out` (shape (6, 6) or larger) receives (xmin, xmax, ymin, ymax, zmin, zmax).
+    With vertical_stability, the space above the AABB is restricted to its footprint.
+
+    Returns:
+        int: The number of rows written.
+    """
+    k = 0
+    if axmax < sxmax:
+        out[k, 0] = axmax; out[k, 1] = sxmax; out[k, 2] = symin; out[k, 3] = symax; out[k, 4] = szmin; out[k, 5] = szmax
+        k += 1
+    if aymax < symax:
+        out[k, 0] = sxmin; out[k, 1] = sxmax; out[k, 2] = aymax; out[k, 3] = symax; out[k, 4] = szmin; out[k, 5] = szmax
+        k += 1
+    if azmax < szmax:
+        if not vertical_stability:
+            out[k, 0] = sxmin; out[k, 1] = sxmax; out[k, 2] = symin; out[k, 3] = symax; out[k, 4] = azmax; out[k, 5] = szmax
+        else:
+            out[k, 0] = axmin; out[k, 1] = axmax; out[k, 2] = aymin; out[k, 3] = aymax; out[k, 4] = azmax; out[k, 5] = szmax
+        k += 1
+    if axmin > sxmin:
+        out[k, 0] = sxmin; out[k, 1] = axmin; out[k, 2] = symin; out[k, 3] = symax; out[k, 4] = szmin; out[k, 5] = szmax
+        k += 1
+    if aymin > symin:
+        out[k, 0] = sxmin; out[k, 1] = sxmax; out[k, 2] = symin; out[k, 3] = aymin; out[k, 4] = szmin; out[k, 5] = szmax
+        k += 1
+    if azmin > szmin:
+        out[k, 0] = sxmin; out[k, 1] = sxmax; out[k, 2] = symin; out[k, 3] = symax; out[k, 4] = szmin; out[k, 5] = azmin
+        k += 1
+    return k
+
+
+@njit(cache=True)
+def _maximal_mask(rows):
+    """
+    Flags the rows (xmin, xmax, ymin, ymax, zmin, zmax) not contained in any other row.
+
+    Rows must be sorted by volume in descending order; among identical rows the first one is kept.
+    Rows are swept along x, ties kept in volume order, so a container is always visited before its
+    contents; the active rows ending before the current xmin are pruned.
+
+    Returns:
+        np.ndarray: Boolean mask of the maximal rows.
+    """
+    m = rows.shape[0]
+    # Stable sort by xmin: a container with the same xmin is larger, or identical and earlier
+    order = np.argsort(rows[:, 0], kind="mergesort")
+
+    keep = np.ones(m, dtype=np.bool_)
+    active = np.empty(m, dtype=np.int64)
+    n_active = 0
+    for j in order:
+        dominated = False
+        w = 0
+        for t in range(n_active):
+            i = active[t]
+            if rows[i, 1] < rows[j, 0]:
+                continue
+            active[w] = i
+            w += 1
+            if (not dominated and
+                    rows[i, 0] <= rows[j, 0] and rows[i, 1] >= rows[j, 1] and
+                    rows[i, 2] <= rows[j, 2] and rows[i, 3] >= rows[j, 3] and
+                    rows[i, 4] <= rows[j, 4] and rows[i, 5] >= rows[j, 5]):
+                dominated = True
+        n_active = w
+        if dominated:
+            keep[j] = False
+        else:
+            active[n_active] = j
+            n_active += 1
+    return keep
+
+
+@njit(cache=True)
+def _crop_kernel(xmin, xmax, ymin, ymax, zmin, zmax, min_packed, max_packed,
+                 axmin, axmax, aymin, aymax, azmin, azmax, a_min, a_max, vertical_stability):
+    """
+    Fused pass of FreeSpace.crop over the space columns: intersection test, subtraction and
+    removal of the non-maximal cuboids, without materializing intermediate spaces.
+
+    Returns:
+        tuple: (hit, rows, sources). hit flags the spaces touching the AABB; rows are the maximal
+        remaining cuboids sorted by volume in descending order; sources holds, for each row, the
+        index of the touching space it comes from unchanged, or -1 for a new cuboid.
+    """
+    n = xmin.shape[0]
+    hit = np.zeros(n, dtype=np.bool_)
+    rows = np.empty((6 * n, 6), dtype=np.int32)
+    sources = np.full(6 * n, -1, dtype=np.int64)
+    count = 0
+    for i in range(n):
+        # Lane-wise max_i >= a_min and a_max >= min_i, the guard bits survive only if no lane borrows
+        if ((max_packed[i] | _GUARD) - a_min) & ((a_max | _GUARD) - min_packed[i]) & _GUARD != _GUARD:
+            continue
+        hit[i] = True
+        if ((max_packed[i] | _GUARD) - a_min - _LANE_ONES) & ((a_max | _GUARD) - min_packed[i] - _LANE_ONES) \
+                & _GUARD == _GUARD:
+            count += _subtract_kernel(xmin[i], xmax[i], ymin[i], ymax[i], zmin[i], zmax[i],
+                                      axmin, axmax, aymin, aymax, azmin, azmax, vertical_stability, rows[count:])
+        else:
+            rows[count, 0] = xmin[i]; rows[count, 1] = xmax[i]; rows[count, 2] = ymin[i]
+            rows[count, 3] = ymax[i]; rows[count, 4] = zmin[i]; rows[count, 5] = zmax[i]
+            sources[count] = i
+            count += 1
+
+    volume = np.empty(count, dtype=np.int64)
+    for k in range(count):
+        volume[k] = (np.int64(rows[k, 1] - rows[k, 0]) * np.int64(rows[k, 3] - rows[k, 2])
+                     * np.int64(rows[k, 5] - rows[k, 4]))
+    order = np.argsort(-volume, kind="mergesort")
+    rows = rows[order]
+    sources = sources[order]
+    survivors = np.flatnonzero(_maximal_mask(rows))
+    return hit, rows[survivors], sources[survivors]
+
+
+@njit(cache=True)
+def _join_dims(l1, w1, h1, l2, w2, h2, dim):
+    """Dimensions (l, w, h) of two blocks joined along dim (0: x, 1: y, 2: z), shared by _joinable_pairs and Block.join."""
+    l = l1 + l2 if dim == 0 else max(l1, l2)
+    w = w1 + w2 if dim == 1 else max(w1, w2)
+    h = h1 + h2 if dim == 2 else max(h1, h2)
+    return l, w, h
+
+
+@njit(cache=True, parallel=True)
+def _joinable_pairs(p_dims, b_dims, min_fr, cont_l, cont_w, cont_h):
+    """
+    Finds every join of a block of P with a block of B that reaches min_fr and fits the container.
+
+    Parameters:
+        p_dims, b_dims (np.ndarray): (n, 4) int64 arrays of (l, w, h, occupied_volume) per block.
+
+    Returns:
+        np.ndarray: (k, 7) array of (index in P, index in B, dim, l, w, h, volume) of the joined
+        blocks, in the order of nested loops over P, B and the dimensions x, y, z.
+    """
+    n_p = p_dims.shape[0]
+    n_b = b_dims.shape[0]
+    # Count the joins of each row of P in parallel, then fill each row's slice of the output
+    counts = np.zeros(n_p, dtype=np.int64)
+    for i in prange(n_p):
+        c = 0
+        for j in range(n_b):
+            for dim in range(3):
+                l, w, h = _join_dims(p_dims[i, 0], p_dims[i, 1], p_dims[i, 2],
+                                     b_dims[j, 0], b_dims[j, 1], b_dims[j, 2], dim)
+                if ((p_dims[i, 3] + b_dims[j, 3]) / (l * w * h) >= min_fr and
+                        l <= cont_l and w <= cont_w and h <= cont_h):
+                    c += 1
+        counts[i] = c
+
+    offsets = np.cumsum(counts) - counts
+    pairs = np.empty((counts.sum(), 7), dtype=np.int64)
+    for i in prange(n_p):
+        k = offsets[i]
+        for j in range(n_b):
+            for dim in range(3):
+                l, w, h = _join_dims(p_dims[i, 0], p_dims[i, 1], p_dims[i, 2],
+                                     b_dims[j, 0], b_dims[j, 1], b_dims[j, 2], dim)
+                if ((p_dims[i, 3] + b_dims[j, 3]) / (l * w * h) >= min_fr and
+                        l <= cont_l and w <= cont_w and h <= cont_h):
+                    pairs[k, 0] = i
+                    pairs[k, 1] = j
+                    pairs[k, 2] = dim
+                    pairs[k, 3] = l
+                    pairs[k, 4] = w
+                    pairs[k, 5] = h
+                    pairs[k, 6] = l * w * h
+                    k += 1
+    return pairs
 
 
 class Boxtype:
@@ -16,6 +208,8 @@ class Boxtype:
         weight (int): Weight of the box. Default is 1.
         volume (int): Volume of the box, calculated as l * w * h.
     """
+    __slots__ = ("id", "l", "w", "h", "rot_l", "rot_w", "rot_h", "weight", "volume")
+
     id: int
     l: int; w: int; h: int
     rot_l: bool; rot_w: bool; rot_h: bool
@@ -37,8 +231,24 @@ class Itemdict(dict):
     - In-place addition (__iadd__) and subtraction (__isub__) of quantities for existing or new keys.
     - Comparison (__le__) to check if all quantities in the dictionary are less than or equal to another.
     - Copying (__copy__) for creating shallow copies.
+
+    Quantities are validated when the dictionary is created and when a Block is built from
+    items, so the in-place operations do not check them again. Quantities assigned one key
+    at a time (d[key] = quantity) are not checked.
     """
 
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes the Itemdict like a dict.
+
+        Raises:
+            ValueError: If any quantity is not an integer.
+        """
+        super().__init__(*args, **kwargs)
+        for quantity in self.values():
+            if not isinstance(quantity, int):
+                raise ValueError("All quantities must be integers.")
+
     def __iadd__(self, other):
         """
         Adds the quantities of another Itemdict to the current one in-place.
@@ -50,10 +260,8 @@ class Itemdict(dict):
         Returns:
             Itemdict: The updated dictionary.
         """
-        for key in other:
-            if not isinstance(other[key], int):
-                raise ValueError("All quantities must be integers.")
-            self[key] = self.get(key, 0) + other[key]
+        for key, quantity in other.items():
+            self[key] = self.get(key, 0) + quantity
         return self
 
     def __isub__(self, other):
@@ -67,10 +275,8 @@ class Itemdict(dict):
         Returns:
             Itemdict: The updated dictionary.
         """
-        for key in other:
-            if not isinstance(other[key], int):
-                raise ValueError("All quantities must be integers.")
-            self[key] = self.get(key, 0) - other[key]
+        for key, quantity in other.items():
+            self[key] = self.get(key, 0) - quantity
         return self
 
     def __le__(self, other):
@@ -101,13 +307,16 @@ class Itemdict(dict):
         """
         Creates a deep copy of the current Itemdict.
 
+        Keys are box types shared by identity and quantities are immutable ints,
+        so a new dictionary with the same content is already a deep copy.
+
         Parameters:
             memo (dict): A memoization dictionary for deep copies.
 
         Returns:
             Itemdict: A deep copy of the dictionary.
         """
-        return Itemdict(deepcopy(dict(self), memo))
+        return Itemdict(self)
 
 
 
@@ -123,6 +332,7 @@ class Aabb:
         manhattan (int): Manhattan distance from the origin (xmin + ymin + zmin).
         volume (int): Volume of the cuboid, calculated as l * w * h.
     """
+    __slots__ = ("xmin", "xmax", "ymin", "ymax", "zmin", "zmax", "l", "w", "h", "volume", "manhattan")
 
     def __init__(self, xmin: int, xmax: int, ymin: int, ymax: int, zmin: int, zmax: int):
         """
@@ -248,114 +458,42 @@ class Aabb:
 
 
 
-class Aabb:
-    """
-    Represents an Axis-Aligned Bounding Box (AABB), a cuboid with location and dimensions.
-
-    Attributes:
-        xmin, xmax (int): Minimum and maximum x-coordinates.
-        ymin, ymax (int): Minimum and maximum y-coordinates.
-        zmin, zmax (int): Minimum and maximum z-coordinates.
-        l, w, h (int): Length, width, and height of the cuboid.
-        volume (int): Volume of the cuboid, calculated as l * w * h.
-    """
-
-    def __init__(self, xmin: int, xmax: int, ymin: int, ymax: int, zmin: int, zmax: int):
-        """
-        Initializes an AABB with its coordinates and calculates its dimensions and volume.
+def _origin_corner(xmin, xmax, ymin, ymax, zmin, zmax, block):
+    """Closest corner for the "origin" filling: always the minimum corner."""
+    return xmin + ymin + zmin, [xmin, ymin, zmin]
 
-        Parameters:
-            xmin, xmax (int): Minimum and maximum x-coordinates.
-            ymin, ymax (int): Minimum and maximum y-coordinates.
-            zmin, zmax (int): Minimum and maximum z-coordinates.
 
-        Raises:
-            ValueError: If any maximum coordinate is less than or equal to its corresponding minimum.
-        """
-        if xmax <= xmin or ymax <= ymin or zmax <= zmin:
-            raise ValueError("Maximum coordinates must be greater than minimum coordinates.")
-        self.xmin = xmin
-        self.xmax = xmax
-        self.ymin = ymin
-        self.ymax = ymax
-        self.zmin = zmin
-        self.zmax = zmax
-        self.l = xmax - xmin
-        self.w = ymax - ymin
-        self.h = zmax - zmin
-        self.volume = self.l * self.w * self.h
+def _bottom_up_corner(xmin, xmax, ymin, ymax, zmin, zmax, block):
+    """Closest corner for the "bottom-up" filling: nearest x and y side, height weighted by 1000."""
+    corner_point = [xmin, ymin, zmin]
+    xdist, ydist = xmin, ymin
+    if block.l - xmax < xmin:
+        xdist = block.l - xmax
+        corner_point[0] = xmax
+    if block.w - ymax < ymin:
+        ydist = block.w - ymax
+        corner_point[1] = ymax
+    return xdist + ydist + 1000 * zmin, corner_point
 
-    def strict_intersects(self, aabb: "Aabb") -> bool:
-        """
-        Checks if the given AABB strictly intersects with the current AABB.
 
-        Parameters:
-            aabb (Aabb): Another AABB to check for intersection.
+def _free_corner(xmin, xmax, ymin, ymax, zmin, zmax, block):
+    """Closest corner for the "free" filling: nearest side on every axis."""
+    corner_point = [xmin, ymin, zmin]
+    xdist, ydist, zdist = xmin, ymin, zmin
+    if block.l - xmax < xmin:
+        xdist = block.l - xmax
+        corner_point[0] = xmax
+    if block.w - ymax < ymin:
+        ydist = block.w - ymax
+        corner_point[1] = ymax
+    if block.h - zmax < zmin:
+        zdist = block.h - zmax
+        corner_point[2] = zmax
+    return xdist + ydist + zdist, corner_point
 
-        Returns:
-            bool: True if the two AABBs strictly intersect, False otherwise.
-        """
-        return (
-            self.xmin < aabb.xmax and self.xmax > aabb.xmin and
-            self.ymin < aabb.ymax and self.ymax > aabb.ymin and
-            self.zmin < aabb.zmax and self.zmax > aabb.zmin
-        )
-
-    def intersects(self, aabb: "Aabb") -> bool:
-        """
-        Checks if the given AABB intersects with or touches the current AABB.
-
-        Parameters:
-            aabb (Aabb): Another AABB to check for intersection.
-
-        Returns:
-            bool: True if the two AABBs intersect or touch, False otherwise.
-        """
-        return (
-            self.xmin <= aabb.xmax and self.xmax >= aabb.xmin and
-            self.ymin <= aabb.ymax and self.ymax >= aabb.ymin and
-            self.zmin <= aabb.zmax and self.zmax >= aabb.zmin
-        )
-
-    def can_contain(self, aabb: "Aabb") -> bool:
-        """
-        Checks if the current AABB can completely contain the given AABB.
-
-        Parameters:
-            aabb (Aabb): Another AABB to check containment.
-
-        Returns:
-            bool: True if the current AABB can contain the given AABB, False otherwise.
-        """
-        return self.l >= aabb.l and self.w >= aabb.w and self.h >= aabb.h
-
-    def __ge__(self, aabb: "Aabb") -> bool:
-        """
-        Checks if the current AABB completely contains the given AABB.
-
-        Parameters:
-            aabb (Aabb): Another AABB to compare.
-
-        Returns:
-            bool: True if the current AABB contains the given AABB, False otherwise.
-        """
-        return (
-            self.xmin <= aabb.xmin and self.xmax >= aabb.xmax and
-            self.ymin <= aabb.ymin and self.ymax >= aabb.ymax and
-            self.zmin <= aabb.zmin and self.zmax >= aabb.zmax
-        )
-
-    def __str__(self) -> str:
-        """
-        Returns a string representation of the AABB.
-
-        Returns:
-            str: A string describing the AABB.
-        """
-        return (f"Aabb(xmin={self.xmin}, xmax={self.xmax}, "
-                f"ymin={self.ymin}, ymax={self.ymax}, "
-                f"zmin={self.zmin}, zmax={self.zmax})")
 
+# Closest corner strategy of each Space.filling, returning (manhattan, corner_point)
+_CLOSEST_CORNER = {"origin": _origin_corner, "bottom-up": _bottom_up_corner, "free": _free_corner}
 
 
 class Space(Aabb):
@@ -369,6 +507,8 @@ class Space(Aabb):
         filling (str): Static variable defining the filling method ("origin", "bottom-up", "free").
         vertical_stability (bool): Static variable indicating if vertical stability is enforced.
     """
+    __slots__ = ("container_block", "corner_point")
+
     filling: str = "origin"
     vertical_stability: bool = True
 
@@ -390,30 +530,18 @@ class Space(Aabb):
             block (Aabb): The block representing the container or related bounding box.
 
         Raises:
-            ValueError: If the coordinates are invalid (e.g., xmax <= xmin).
+            ValueError: If the coordinates are invalid (e.g., xmax <= xmin), or if Space.filling is
+                not one of "origin", "bottom-up" or "free".
         """
         super().__init__(xmin, xmax, ymin, ymax, zmin, zmax)
         self.container_block = block
-        self.corner_point = [xmin, ymin, zmin]
 
         # Compute Manhattan distance and closest corner based on filling strategy.
-        xdist, ydist, zdist = xmin, ymin, zmin
-        if Space.filling == "bottom-up":
-            zdist = 1000 * zmin  # Increase priority for bottom-up filling.
-
-        if block.l - xmax < xmin and Space.filling != "origin":
-            xdist = block.l - xmax
-            self.corner_point[0] = xmax
-
-        if block.w - ymax < ymin and Space.filling != "origin":
-            ydist = block.w - ymax
-            self.corner_point[1] = ymax
-
-        if block.h - zmax < zmin and Space.filling == "free":
-            zdist = block.h - zmax
-            self.corner_point[2] = zmax
-
-        self.manhattan = xdist + ydist + zdist
+        try:
+            closest_corner = _CLOSEST_CORNER[Space.filling]
+        except KeyError:
+            raise ValueError(f"Unknown filling {Space.filling!r}, expected one of {list(_CLOSEST_CORNER)}.") from None
+        self.manhattan, self.corner_point = closest_corner(xmin, xmax, ymin, ymax, zmin, zmax, block)
 
     def subtract(self, aabb: Aabb, container_block: Aabb) -> list["Space"]:
         """
@@ -456,12 +584,20 @@ class Space(Aabb):
 class FreeSpace:
     """
     Represents the free spaces inside a block, consisting of a list of AABBs (spaces).
-    
+
+    The coordinates of the spaces are mirrored in a Structure-of-Arrays (one NumPy column per
+    attribute) so intersection and containment tests run as broadcasted array comparisons.
+
     Attributes:
         spaces (list[Space]): A list of free space cuboids (AABB objects).
     """
     spaces: list
 
+    _COLUMNS = {
+        "xmin": np.int32, "xmax": np.int32, "ymin": np.int32, "ymax": np.int32, "zmin": np.int32, "zmax": np.int32,
+        "min_packed": np.uint64, "max_packed": np.uint64,
+    }
+
     def __init__(self, aabb: Space = None):
         """
         Initializes the FreeSpace object.
@@ -470,8 +606,62 @@ class FreeSpace:
             aabb (Space, optional): An initial AABB to add to the free space list.
         """
         self.spaces = []
+        # Column arrays, allocated by the first _extend: most blocks never get a free space
+        self._arr = None
         if aabb is not None:
-            self.spaces.append(aabb)
+            self._extend([aabb])
+
+    def _extend(self, spaces: list[Space]):
+        """
+        Appends spaces to the free space list and to the column arrays, growing them geometrically.
+
+        Parameters:
+            spaces (list[Space]): The spaces to append.
+
+        Raises:
+            ValueError: If any coordinate is outside [0, 2**20), the range of the packed lanes.
+        """
+        n = len(self.spaces)
+        size = n + len(spaces)
+        if self._arr is None:
+            self._arr = {name: np.empty(max(8, size), dtype=dtype) for name, dtype in FreeSpace._COLUMNS.items()}
+        capacity = len(self._arr["xmin"])
+        if size > capacity:
+            while capacity < size:
+                capacity *= 2
+            for name, column in self._arr.items():
+                grown = np.empty(capacity, dtype=column.dtype)
+                grown[:n] = column[:n]
+                self._arr[name] = grown
+
+        # The packed lanes are only exact for coordinates in [0, 2**20)
+        coords = np.array([(space.xmin, space.xmax, space.ymin, space.ymax, space.zmin, space.zmax)
+                           for space in spaces], dtype=np.int64).reshape(-1, 6)
+        if coords.size and (coords.min() < 0 or coords.max() >= _COORD_LIMIT):
+            raise ValueError(f"Space coordinates must lie in [0, {_COORD_LIMIT}).")
+
+        arr = self._arr
+        for k, name in enumerate(("xmin", "xmax", "ymin", "ymax", "zmin", "zmax")):
+            arr[name][n:size] = coords[:, k]
+        arr["min_packed"][n:size] = _pack(arr["xmin"][n:size].astype(np.uint64), arr["ymin"][n:size].astype(np.uint64),
+                                          arr["zmin"][n:size].astype(np.uint64))
+        arr["max_packed"][n:size] = _pack(arr["xmax"][n:size].astype(np.uint64), arr["ymax"][n:size].astype(np.uint64),
+                                          arr["zmax"][n:size].astype(np.uint64))
+        self.spaces.extend(spaces)
+
+    def _keep(self, keep: np.ndarray):
+        """
+        Keeps only the spaces flagged in the mask, compacting the column arrays in place.
+
+        Parameters:
+            keep (np.ndarray): Boolean mask over the current spaces.
+        """
+        if self._arr is None:
+            return
+        size = int(keep.sum())
+        for column in self._arr.values():
+            column[:size] = column[:len(keep)][keep]
+        self.spaces = [space for space, kept in zip(self.spaces, keep) if kept]
 
     def remove_nonmaximal_spaces(self, aabbs: list[Space]):
         """
@@ -482,17 +672,12 @@ class FreeSpace:
         """
         # Sort spaces by volume in descending order
         aabbs.sort(key=lambda aabb: aabb.volume, reverse=True)
-        to_remove = set()
-
-        for i in range(len(aabbs)):
-            for j in range(i + 1, len(aabbs)):
-                if j in to_remove:
-                    continue
-                if aabbs[i] >= aabbs[j]:
-                    to_remove.add(j)
+        rows = np.array([(aabb.xmin, aabb.xmax, aabb.ymin, aabb.ymax, aabb.zmin, aabb.zmax) for aabb in aabbs],
+                        dtype=np.int32).reshape(-1, 6)
+        keep = _maximal_mask(rows)
 
         # Remove non-maximal spaces
-        aabbs[:] = [aabbs[i] for i in range(len(aabbs)) if i not in to_remove]
+        aabbs[:] = [aabb for aabb, kept in zip(aabbs, keep) if kept]
 
     def crop(self, aabb: Space, container_block: Space):
         """
@@ -501,24 +686,36 @@ class FreeSpace:
         Parameters:
             aabb (Space): The AABB to subtract.
             container_block (Space): The container block defining boundaries.
-        """
-        new_spaces = []
-        to_remove = []
-
-        for space in self.spaces:
-            if space.intersects(aabb):
-                if space.strict_intersects(aabb):
-                    new_spaces.extend(space.subtract(aabb, container_block))
-                else:
-                    new_spaces.append(space)
 
-                to_remove.append(space)
+        Raises:
+            ValueError: If any coordinate of the AABB is outside [0, 2**20), the range of the packed lanes.
+        """
+        n = len(self.spaces)
+        if n == 0:
+            return
+        if min(aabb.xmin, aabb.ymin, aabb.zmin) < 0 or max(aabb.xmax, aabb.ymax, aabb.zmax) >= _COORD_LIMIT:
+            raise ValueError(f"AABB coordinates must lie in [0, {_COORD_LIMIT}).")
+        arr = self._arr
+        # Broad phase is a single pass over the packed columns: a container holds a few dozen
+        # spaces, so keeping a spatial index (R-tree, grid) up to date would cost more than the scan
+        hit, rows, sources = _crop_kernel(
+            arr["xmin"][:n], arr["xmax"][:n], arr["ymin"][:n], arr["ymax"][:n], arr["zmin"][:n], arr["zmax"][:n],
+            arr["min_packed"][:n], arr["max_packed"][:n],
+            aabb.xmin, aabb.xmax, aabb.ymin, aabb.ymax, aabb.zmin, aabb.zmax,
+            np.uint64(_pack(aabb.xmin, aabb.ymin, aabb.zmin)), np.uint64(_pack(aabb.xmax, aabb.ymax, aabb.zmax)),
+            Space.vertical_stability,
+        )
+        if not hit.any():
+            return
 
-        for space in to_remove:
-            self.spaces.remove(space)
+        # Spaces only touching the AABB are kept as they are, Space objects are built for the rest
+        new_spaces = [
+            self.spaces[source] if source >= 0 else Space(*row, container_block)
+            for row, source in zip(rows.tolist(), sources.tolist())
+        ]
 
-        self.remove_nonmaximal_spaces(new_spaces)
-        self.spaces.extend(new_spaces)
+        self._keep(~hit)
+        self._extend(new_spaces)
 
     def closest_space(self) -> Space | None:
         """
@@ -536,16 +733,21 @@ class FreeSpace:
         Parameters:
             items (dict[Boxtype, int]): A dictionary mapping item types to their quantities.
         """
-        to_remove = []
-        for space in self.spaces:
-            if not any(
-                items[item] > 0 and space.l >= item.l and space.w >= item.w and space.h >= item.h
-                for item in items
-            ):
-                to_remove.append(space)
-
-        for space in to_remove:
-            self.spaces.remove(space)
+        available = [item for item in items if items[item] > 0]
+        il = np.fromiter((item.l for item in available), dtype=np.int32, count=len(available))
+        iw = np.fromiter((item.w for item in available), dtype=np.int32, count=len(available))
+        ih = np.fromiter((item.h for item in available), dtype=np.int32, count=len(available))
+
+        # Test every space against every available item at once
+        n = len(self.spaces)
+        if n == 0:
+            return
+        arr = self._arr
+        l = arr["xmax"][:n] - arr["xmin"][:n]
+        w = arr["ymax"][:n] - arr["ymin"][:n]
+        h = arr["zmax"][:n] - arr["zmin"][:n]
+        fits = (l[:, None] >= il) & (w[:, None] >= iw) & (h[:, None] >= ih)
+        self._keep(fits.any(axis=1))
 
     def __str__(self) -> str:
         """
@@ -561,6 +763,22 @@ from copy import copy
 from types import NoneType
 
 
+# Candidate joins (pairs of blocks times dimensions) tested per call to _joinable_pairs
+_JOIN_CANDIDATES = 1 << 16
+
+# Index of each join dimension in _join_dims
+_JOIN_AXES = {"x": 0, "y": 1, "z": 2}
+
+# Permutation of the boxtype dimensions (l, w, h) giving the block (l, w, h) for each rotation
+_ROTATIONS = {
+    "lwh": (0, 1, 2), "whl": (1, 2, 0), "hwl": (2, 1, 0),
+    "lhw": (0, 2, 1), "hlw": (2, 0, 1), "wlh": (1, 0, 2),
+}
+
+# Rotations added to the "lwh" block of a boxtype, with the boxtype flag allowing each of them
+_SIMPLE_ROTATIONS = (("whl", "rot_l"), ("hwl", "rot_l"), ("lhw", "rot_w"), ("hlw", "rot_w"), ("wlh", "rot_h"))
+
+
 class Block:
     """
     Represents a block composed of items (boxtype and quantity) with defined dimensions and properties.
@@ -598,6 +816,9 @@ class Block:
             l, w, h (int, optional): Dimensions of the block for custom initialization.
             copy_block (Block, optional): A block to copy.
             items (dict, optional): Dictionary of items to initialize the block.
+
+        Raises:
+            ValueError: If any quantity in items is not an integer.
         """
         if items is not None:
             # Block composed of items
@@ -607,6 +828,8 @@ class Block:
             self.occupied_volume = 0
             self.items = Itemdict()
             for item, quantity in items.items():
+                if not isinstance(quantity, int):
+                    raise ValueError("All quantities must be integers.")
                 self.occupied_volume += item.volume * quantity
                 self.weight += item.weight * quantity
                 self.items[item] = quantity
@@ -641,18 +864,12 @@ class Block:
 
     def _initialize_from_boxtype(self, boxtype, rot):
         """Helper function to initialize block dimensions from a boxtype."""
-        self.l = self.w = self.h = 0
-        if rot[0] == 'w': self.l = boxtype.w
-        if rot[1] == 'w': self.w = boxtype.w
-        if rot[2] == 'w': self.h = boxtype.w
-
-        if rot[0] == 'l': self.l = boxtype.l
-        if rot[1] == 'l': self.w = boxtype.l
-        if rot[2] == 'l': self.h = boxtype.l
-
-        if rot[0] == 'h': self.l = boxtype.h
-        if rot[1] == 'h': self.w = boxtype.h
-        if rot[2] == 'h': self.h = boxtype.h
+        try:
+            p = _ROTATIONS[rot]
+        except KeyError:
+            raise ValueError(f"Unknown rotation {rot!r}, expected one of {list(_ROTATIONS)}.") from None
+        dims = (boxtype.l, boxtype.w, boxtype.h)
+        self.l, self.w, self.h = dims[p[0]], dims[p[1]], dims[p[2]]
 
         self.weight = boxtype.weight
         self.occupied_volume = boxtype.volume
@@ -686,35 +903,44 @@ class Block:
         Returns:
             bool: True if the blocks were successfully joined, False otherwise.
         """
-        if dim == 'x':
-            l = self.l + block.l
-            w = max(self.w, block.w)
-            h = max(self.h, block.h)
-        elif dim == 'y':
-            l = max(self.l, block.l)
-            w = self.w + block.w
-            h = max(self.h, block.h)
-        elif dim == 'z':
-            l = max(self.l, block.l)
-            w = max(self.w, block.w)
-            h = self.h + block.h
-        else:
+        if dim not in _JOIN_AXES:
             return False
 
+        l, w, h = _join_dims(self.l, self.w, self.h, block.l, block.w, block.h, _JOIN_AXES[dim])
         new_volume = l * w * h
         if (self.occupied_volume + block.occupied_volume) / new_volume < min_fr:
             return False
 
+        self._merge(block, l, w, h, new_volume)
+        return True
+
+    def _merge(self, block, l, w, h, volume):
+        """
+        Merges another block into this one, giving it the already computed joined dimensions.
+
+        Parameters:
+            block (Block): The block to merge.
+            l, w, h (int): Dimensions of the joined block.
+            volume (int): Volume of the joined block (l * w * h).
+        """
         self.l, self.w, self.h = l, w, h
-        self.volume = new_volume
+        self.volume = volume
         self.weight += block.weight
         self.occupied_volume += block.occupied_volume
         self.items += block.items
-        return True
     
-    def is_constructible(self, items):
-        for item in self.items:
-            if items[item] < self.items[item]:
+    def is_constructible(self, items) -> bool:
+        """
+        Checks if the block can be built with the given items.
+
+        Parameters:
+            items (dict): Dictionary of items (boxtype -> quantity).
+
+        Returns:
+            bool: True if every box type of the block is available in the required quantity.
+        """
+        for item, quantity in self.items.items():
+            if items[item] < quantity:
                 return False
         return True
 
@@ -754,14 +980,7 @@ class BlockList(list):
         """
         for item in items:
             self.append(Block(item, "lwh"))
-            if item.rot_l:
-                self.append(Block(item, "whl"))
-                self.append(Block(item, "hwl"))
-            if item.rot_w:
-                self.append(Block(item, "lhw"))
-                self.append(Block(item, "hlw"))
-            if item.rot_h:
-                self.append(Block(item, "wlh"))
+            self.extend([Block(item, rot) for rot, flag in _SIMPLE_ROTATIONS if getattr(item, flag)])
 
     def generate_general_blocks(self, items: dict, cont, min_fr=0.98, max_bl=10000):
         """
@@ -779,16 +998,25 @@ class BlockList(list):
 
         while len(B) < max_bl:
             N = []
-            for b1 in P:
-                for b2 in B:
-                    for new_block in Block.generate_blocks(b1, b2, min_fr):
-                        if new_block.is_constructible(items) and new_block <= cont:
-                            N.append(new_block)
-                            if len(B) + len(N) >= max_bl:
-                                break
-                    if len(B) + len(N) >= max_bl:
-                        break
-                if len(B) + len(N) >= max_bl:
+            # Find the joins reaching min_fr and fitting in the container, with their dimensions and
+            # volume, over parallel arrays; then only build those, in the order nested loops would.
+            # P is processed in slices of about _JOIN_CANDIDATES candidate joins, so the pass stops
+            # as soon as max_bl is reached instead of listing every join of P x B first
+            p_dims = np.array([(b.l, b.w, b.h, b.occupied_volume) for b in P], dtype=np.int64).reshape(-1, 4)
+            b_dims = np.array([(b.l, b.w, b.h, b.occupied_volume) for b in B], dtype=np.int64).reshape(-1, 4)
+            step = max(1, _JOIN_CANDIDATES // (3 * max(1, len(B))))
+            full = False
+            for start in range(0, len(P), step):
+                pairs = _joinable_pairs(p_dims[start:start + step], b_dims, min_fr, cont.l, cont.w, cont.h)
+                for i, j, _, l, w, h, volume in pairs.tolist():
+                    new_block = Block(copy_block=P[start + i])
+                    new_block._merge(B[j], l, w, h, volume)
+                    if new_block.is_constructible(items):
+                        N.append(new_block)
+                        if len(B) + len(N) >= max_bl:
+                            full = True
+                            break
+                if full:
                     break
 
             if not N:
@@ -830,9 +1058,7 @@ class BlockList(list):
             blocks (list): List of blocks to filter.
             items (dict): Dictionary of items (boxtype -> quantity).
         """
-        to_remove = [block for block in blocks if not block.is_constructible(items)]
-        for block in to_remove:
-            blocks.remove(block)
+        blocks[:] = [block for block in blocks if block.is_constructible(items)]
 
     def __str__(self):
         """
@@ -1,14 +1,103 @@
-import random
 import numpy as np
 import os
 import platform
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from numba import njit
 
-def get_uni(filename:str,n_types:int=10, instances:int=1,initial_seed:int=40):
-    try:
-        os.makedirs("tests/instances", exist_ok=True)
-    except Exception as e:
-        print(f"Error creating folder: {e}")
 
+@njit(cache=True)
+def _fill_cantidades(picks, volumen_box_type, tc):
+    """
+    Adds the randomly picked box types in order (one of each type to begin with) while they fit in the container volume tc.
+    Returns the quantity of each box type.
+    """
+    n = volumen_box_type.shape[0]
+    cantidad_box_type = np.ones(n, dtype=np.int32)
+
+    #volumen de carga inicial, se calcula una vez y se actualiza con cada caja agregada
+    volumen_cargo = volumen_box_type.sum()
+
+    #agrega cajas al azar mientras quepan en el contenedor
+    for aux in picks:
+        nuevo_total = volumen_cargo + volumen_box_type[aux]
+
+        if nuevo_total < tc:
+            cantidad_box_type[aux] += 1
+            volumen_cargo = nuevo_total
+        else:
+            break
+
+    return cantidad_box_type
+
+
+#cantidad de instancias desde la que get_uni las genera en un pool de procesos: levantar cada
+#proceso (spawn en Windows) cuesta unas decimas de segundo y cada instancia unos 60 us
+_MIN_PARALLEL_INSTANCES = 20000
+
+
+#plantillas de las filas de una instancia por numero de tipos de caja, se arman una vez por proceso
+_ROW_TEMPLATES = {}
+
+def _row_template(n:int) -> str:
+    """
+    Returns the format string for the n box type rows of an instance, with each row index already written in.
+    """
+    template = _ROW_TEMPLATES.get(n)
+    if template is None:
+        template = _ROW_TEMPLATES[n] = "".join(str(k + 1) + " {} {} {} {} {} {} {}\n" for k in range(n))
+    return template
+
+
+def _gen_instance(idx:int, seed:int, n:int, low, high, L:int, tc:int, header_dims:str) -> str:
+    """
+    Generates a single CLP instance and returns it formatted as text, ready to be written to the instances file.
+    """
+    rng = np.random.default_rng(seed)
+
+    #inicializa las dimensiones de las cajas, uniformes en [alpha, beta] para cada eje.
+    #se sortean como int32 (misma secuencia que int64) y se guardan como int16, bastan para [20, 120]
+    dimension_box = rng.integers(low, high, size=(n, 3), dtype=np.int32)
+    #guarda el volumen de las cajas creadas (a lo mas 120*100*80, cabe en int32)
+    volumen_box_type = dimension_box.prod(axis=1, dtype=np.int32)
+    dimension_box = dimension_box.astype(np.int16)
+    #busca la dimension mas baja de cada caja
+    min_dim = dimension_box.min(axis=1, keepdims=True)
+    #verifica si la orientacion es viable (dim/min < L equivale a dim < L*min)
+    orientacion_box = (dimension_box < L*min_dim).astype(np.int8)
+
+
+    #sortea de una vez los tipos de caja a agregar; con cada caja se suma al menos el
+    #volumen minimo, asi que estos bastan para llenar el contenedor
+    max_picks = max(tc - int(volumen_box_type.sum()), 0) // int(volumen_box_type.min()) + 1
+    picks = rng.integers(0, n, size=max_picks, dtype=np.int32)
+
+    #completa la carga, compilado con numba
+    cantidad_box_type = _fill_cantidades(picks, volumen_box_type, tc)
+
+
+    #Guarda la instancia creada: parametros base y una fila por tipo de caja
+    rows = np.column_stack((dimension_box[:, 0], orientacion_box[:, 0],
+                            dimension_box[:, 1], orientacion_box[:, 1],
+                            dimension_box[:, 2], orientacion_box[:, 2],
+                            cantidad_box_type))
+    header = f"{idx + 1} {seed}\n{header_dims}"
+    body = _row_template(n).format(*rows.ravel().tolist())
+    return header + body
+
+
+def _write_instances(file_path:str, instances:int, blocks):
+    """
+    Writes the instance count and then the formatted instances, in order, to file_path.
+    """
+    #abre el archivo para guardarlo, en el orden de las instancias (buffer de 1 MiB)
+    with open(file_path, 'w', buffering=1<<20) as f:
+        f.write(str(instances)+"\n")
+        for block in blocks:
+            f.write(block)
+
+
+def get_uni(filename:str,n_types:int=10, instances:int=1,initial_seed:int=40,max_workers:int=None):
     """
     Generates instances of n_types of boxes for the container loading problem (CLP) and saves them in a .txt file.
 
@@ -17,7 +106,13 @@ def get_uni(filename:str,n_types:int=10, instances:int=1,initial_seed:int=40):
         n_types (int): The number of different box types for the container loading problem. Default is 10.
         instances (int): The number of instances to generate for the CLP. Default is 1.
         initial_seed (int): The seed value for random number generation, ensuring reproducibility. Default is 40.
+        max_workers (int): The number of worker processes used to generate the instances. Default is the number of CPUs.
+            Instances are generated serially, without a pool, when max_workers is 1 or there are fewer than 20000.
     """
+    try:
+        os.makedirs("tests/instances", exist_ok=True)
+    except Exception as e:
+        print(f"Error creating folder: {e}")
 
 
     #dimensiones de contenedor
@@ -39,105 +134,29 @@ def get_uni(filename:str,n_types:int=10, instances:int=1,initial_seed:int=40):
     #constante de estabilidad
     L=2
 
-    #Semilla
-    s=initial_seed
+    #Semillas, una por instancia
+    seeds = [initial_seed + 100*i for i in range(instances)]
 
     #Volumen de contenedor
     tc = l*h*w
 
-    #limites de cajas
-    low_bound= [alpha1, alpha2, alpha3]
-    upper_bound= [beta1, beta2, beta3]
-
-    file = "tests/instances/" + filename + ".txt"
-
-    #abre el archivo para guardarlo
-    with open(file, 'w') as file:
-        file.write(str(instances)+"\n")
-        for instance in range(instances):
-            #arreglo con dimensiones, cantidad y volumen de los tipos de cajas
-            dimension_box = []
-            cantidad_box_type= []
-            volumen_box_type=[]
-
-            orientacion_box=[]
-
-            #Inicializa el volumen de carga de cajas
-            volumen_cargo = 0
-
-            #guarda parametros base
-            file.write(str(instance + 1)+" "+str(s)+"\n")
-            file.write(str(l)+" "+str(w)+" "+str(h)+"\n")
-            file.write(str(n)+"\n")
-
-            i=0
-
-            random.seed(s)
-
-            for i in range(n):
-                #inicializa las dimensiones de las cajas aleatoreamente dentro de los rangos
-                r_j= [random.randint(alpha1,beta1),random.randint(alpha2,beta2),random.randint(alpha3,beta3)]
-
-                aux_dim=[]
-
-                #Define las dimensiones de las cajas asegurando que este en los rangos limites
-                for j in range(3):
-                    aux_dim.append(low_bound[j]+(r_j[j]%(upper_bound[j]-low_bound[j]+1)))
-
-                #Guarda el arreglo dentro de otro arreglo
-                dimension_box.append(aux_dim)
-
-                #print(dimension_box)
-                #inicializa el tipo de caja
-                cantidad_box_type.append(1)
-                #guarda el volumen de la caja creada
-                volumen_box_type.append(dimension_box[i][0]*dimension_box[i][1]*dimension_box[i][2])
-                min_dim=99999
-                #busca la dimension mas baja de la caja
-                for j in range(3):
-                    if dimension_box[i][j] < min_dim:
-                            min_dim=dimension_box[i][j]
-
-                aux_orient=[]
-                #verifica si la orientacion es viable
-                for j in range(3):
-                    if dimension_box[i][j]/min_dim < L:
-                        aux_orient.append(1)
-                    else:
-                        aux_orient.append(0)
-
-                orientacion_box.append(aux_orient)
-
-
-
-            v_k = 0
-            flag = True
-
-            #[1,1,1,1,1]*[30,20,25,4,5]
-            while flag:
-                volumen_cargo = 0
-                #calcula el volumen de de carga
-                for i in range(n):
-                    volumen_cargo +=cantidad_box_type[i]*volumen_box_type[i];
-
-                aux=random.randint(0,n-1)
-                v_k= volumen_box_type[aux]
-
-                if tc > volumen_cargo + v_k:
-                    cantidad_box_type[aux]+=1
-                else:
-                    break
-
-
-            #Guarda la instancia creada
-            for i in range(n):
-                file.write(str(i+1))
+    #limites de cajas: dimension j en [alpha_j, beta_j] (high exclusivo, como en rng.integers)
+    low = np.array([alpha1, alpha2, alpha3])
+    high = np.array([beta1, beta2, beta3]) + 1
 
-                for j in range(3):
-                    file.write(" "+str(dimension_box[i][j])+" "+str(orientacion_box[i][j]))
-                file.write(" "+str(cantidad_box_type[i])+"\n")
+    #parametros comunes a todas las instancias
+    header_dims = f"{l} {w} {h}\n{n}\n"
 
+    file_path = "tests/instances/" + filename + ".txt"
 
-            s+=100
+    #parametros fijos de _gen_instance, cada instancia solo cambia su indice y su semilla
+    gen_instance = partial(_gen_instance, n=n, low=low, high=high, L=L, tc=tc, header_dims=header_dims)
+    args = (range(instances), seeds)
 
-    file.close()
\ No newline at end of file
+    #con pocas instancias levantar los procesos cuesta mas de lo que se gana, se generan en serie
+    if max_workers == 1 or instances < _MIN_PARALLEL_INSTANCES:
+        _write_instances(file_path, instances, map(gen_instance, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            chunksize = max(1, instances // (4*(max_workers or os.cpu_count() or 1)))
+            _write_instances(file_path, instances, executor.map(gen_instance, *args, chunksize=chunksize))
@@ -1,27 +1,49 @@
 import subprocess
 import os
+import shlex
+from concurrent.futures import ThreadPoolExecutor
 
-def generarSolucionesSolver(instances=1):
-    os.makedirs("tests/resultados_solver", exist_ok=True)
+# Ejecutable y argumentos del solver, comunes a todas las instancias (-i se agrega por instancia)
+_SOLVER = "/root/proyecto/solver/BSG_CLP2"                   # Ruta absoluta del ejecutable en WSL
+_SOLVER_ARGS = " ".join([
+    "-f", "BR",                                               # Ajusta si tu formato no es BR
+    "-t", "5",
+    "--verbose2=5",
+    "/root/proyecto/tests/instances/instances.txt",           # Ruta absoluta del archivo de instancias
+])
+
+def _comando(indices, carpeta, lote):
+    # Un solo arranque de WSL resuelve todas las instancias del lote, una tras otra,
+    # y deja cada salida en la carpeta de resultados (ruta de Windows traducida con wslpath).
+    # El lote queda fijo en un nucleo para no competir con los otros lotes por la cache; el nucleo
+    # se elige dentro de WSL con nproc, que puede tener menos procesadores que Windows
+    script = (
+        f"out=\"$(wslpath -u {shlex.quote(carpeta)})\"; "
+        f"nucleo=$(({lote} % $(nproc))); "
+        f"for i in {' '.join(map(str, indices))}; do "
+        f"taskset -c $nucleo {_SOLVER} -i $i {_SOLVER_ARGS} > \"$out/output$((i+1)).txt\"; "
+        "done"
+    )
+    # -e ejecuta bash directamente; sin el, el shell por defecto de WSL expandiria $i y $out antes
+    return ["wsl", "-e", "bash", "-c", script]
 
-    for i in range(instances):
-        command = [
-            "wsl",
-            "/root/proyecto/solver/BSG_CLP2",                 # Ruta absoluta del ejecutable en WSL
-            "-i", str(i),
-            "-f", "BR",                                       # Ajusta si tu formato no es BR
-            "-t", "5",
-            "--verbose2=5",
-            "/root/proyecto/tests/instances/instances.txt"    # Ruta absoluta del archivo de instancias
-        ]
+def _resolver(indices, carpeta, lote):
+    command = _comando(indices, carpeta, lote)
+    print(f"Ejecutando: {' '.join(command)}")
 
-        print(f"Ejecutando: {' '.join(command)}")
-        
-        result = subprocess.run(command, capture_output=True, text=True)
+    proc = subprocess.Popen(command, stderr=subprocess.PIPE)
+    _, err = proc.communicate()
 
-        output_file = f"tests/resultados_solver/output{i+1}.txt"
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(result.stdout)
+    if err:
+        print(f"Errores:\n{err.decode(errors='replace')}")
+
+def generarSolucionesSolver(instances=1):
+    os.makedirs("tests/resultados_solver", exist_ok=True)
+    carpeta = os.path.abspath("tests/resultados_solver")
 
-        if result.stderr:
-            print(f"Errores:\n{result.stderr}")
\ No newline at end of file
+    # Cada llamada al solver espera su proceso, asi que se lanzan lotes en paralelo,
+    # uno por CPU (el lote k fijo en un nucleo de WSL), intercalando las instancias para repartir el trabajo
+    workers = min(os.cpu_count() or 1, instances) or 1
+    lotes = [range(k, instances, workers) for k in range(workers)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(_resolver, lotes, [carpeta]*workers, range(workers)))
@@ -0,0 +1,180 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import clp.base
+from clp.base import Aabb, Block, BlockList, Boxtype, FreeSpace, Itemdict, Space
+
+
+def reference_crop(spaces, aabb, container_block):
+    """Pure-Python FreeSpace.crop: intersects / strict_intersects / subtract and __ge__ dominance."""
+    kept, new_spaces = [], []
+    for space in spaces:
+        if space.intersects(aabb):
+            if space.strict_intersects(aabb):
+                new_spaces.extend(space.subtract(aabb, container_block))
+            else:
+                new_spaces.append(space)
+        else:
+            kept.append(space)
+    new_spaces.sort(key=lambda space: space.volume, reverse=True)
+    maximal = [space for j, space in enumerate(new_spaces) if not any(other >= space for other in new_spaces[:j])]
+    return kept + maximal
+
+
+def reference_general_blocks(items, cont, min_fr, max_bl):
+    """Pure-Python BlockList.generate_general_blocks: nested loops over P, B and the join dimensions."""
+    B = list(BlockList(items, "simple_blocks"))
+    P = list(B)
+    while len(B) < max_bl:
+        N = []
+        for b1 in P:
+            for b2 in B:
+                for dim in "xyz":
+                    new_block = Block(copy_block=b1)
+                    if (new_block.join(b2, dim, min_fr) and new_block.l <= cont.l and new_block.w <= cont.w
+                            and new_block.h <= cont.h and new_block.is_constructible(items)):
+                        N.append(new_block)
+                        if len(B) + len(N) >= max_bl:
+                            break
+                if len(B) + len(N) >= max_bl:
+                    break
+            if len(B) + len(N) >= max_bl:
+                break
+        if not N:
+            break
+        B.extend(N)
+        P = N
+    return B
+
+
+def blocks(blocks):
+    return [(b.l, b.w, b.h, b.volume, b.occupied_volume, b.weight, sorted((t.id, q) for t, q in b.items.items()))
+            for b in blocks]
+
+
+def coords(spaces):
+    return [(s.xmin, s.xmax, s.ymin, s.ymax, s.zmin, s.zmax, s.manhattan, list(s.corner_point)) for s in spaces]
+
+
+@pytest.fixture
+def space_settings():
+    filling, stability = Space.filling, Space.vertical_stability
+    yield
+    Space.filling, Space.vertical_stability = filling, stability
+
+
+@pytest.mark.parametrize("filling", ["origin", "bottom-up", "free"])
+@pytest.mark.parametrize("vertical_stability", [True, False])
+def test_crop_matches_reference_on_random_packings(filling, vertical_stability, space_settings):
+    Space.filling, Space.vertical_stability = filling, vertical_stability
+    for seed in range(60):
+        rnd = random.Random(seed)
+        types = [Boxtype(i, rnd.randint(20, 120), rnd.randint(20, 100), rnd.randint(20, 80)) for i in range(6)]
+        items = Itemdict({t: rnd.randint(5, 30) for t in types})
+        cont = Block(l=587, w=233, h=220)
+        expected = list(cont.free_space.spaces)
+        for _ in range(60):
+            space = cont.free_space.closest_space()
+            if space is None:
+                break
+            candidates = [t for t in types if items[t] > 0 and t.l <= space.l and t.w <= space.w and t.h <= space.h]
+            if not candidates:
+                break
+            block = Block(rnd.choice(candidates), "lwh")
+            x, y, z = space.corner_point
+            if x == space.xmax: x -= block.l
+            if y == space.ymax: y -= block.w
+            if z == space.zmax: z -= block.h
+            aabb = Aabb(x, x + block.l, y, y + block.w, z, z + block.h)
+
+            expected = reference_crop(expected, aabb, block)
+            cont.add_block(block, x, y, z)
+            assert coords(cont.free_space.spaces) == coords(expected)
+
+            items -= block.items
+            cont.free_space.filter(items)
+            expected = [s for s in expected if any(q > 0 and s.l >= t.l and s.w >= t.w and s.h >= t.h
+                                                   for t, q in items.items())]
+
+
+def test_crop_matches_reference_on_touching_spaces(space_settings):
+    # Coordinates on a coarse grid, so many spaces share faces, edges or corners with the AABB
+    Space.filling, Space.vertical_stability = "free", False
+    rnd = random.Random(0)
+    container = Block(l=40, w=40, h=40)
+
+    def random_box(cls, *args):
+        lo = [rnd.randrange(0, 32, 8) for _ in range(3)]
+        hi = [v + rnd.randrange(8, 17, 8) for v in lo]
+        return cls(lo[0], hi[0], lo[1], hi[1], lo[2], hi[2], *args)
+
+    for _ in range(400):
+        spaces = [random_box(Space, container) for _ in range(rnd.randint(1, 12))]
+        free_space = FreeSpace()
+        free_space._extend(spaces)
+        aabb = random_box(Aabb)
+        expected = reference_crop(spaces, aabb, container)
+        free_space.crop(aabb, container)
+        assert coords(free_space.spaces) == coords(expected)
+
+
+def test_remove_nonmaximal_spaces_matches_reference():
+    rnd = random.Random(1)
+    container = Block(l=40, w=40, h=40)
+    for _ in range(300):
+        spaces = []
+        for _ in range(rnd.randint(1, 20)):
+            lo = [rnd.randint(0, 30) for _ in range(3)]
+            spaces.append(Space(lo[0], lo[0] + rnd.randint(1, 10), lo[1], lo[1] + rnd.randint(1, 10),
+                                lo[2], lo[2] + rnd.randint(1, 10), container))
+        spaces.sort(key=lambda space: space.volume, reverse=True)
+        expected = [s for j, s in enumerate(spaces) if not any(other >= s for other in spaces[:j])]
+        FreeSpace().remove_nonmaximal_spaces(spaces)
+        assert spaces == expected
+
+
+def test_remove_nonmaximal_spaces_beyond_packed_range():
+    container = Block(l=10, w=10, h=10)
+    big = Space(0, 10, 2**21 - 1, 2**21 + 10, 0, 10, container)
+    small = Space(0, 5, 2**21, 2**21 + 5, 0, 5, container)
+    spaces = [big, small]
+    FreeSpace().remove_nonmaximal_spaces(spaces)
+    assert spaces == [big]
+
+
+@pytest.mark.parametrize("bounds", [(-1, 10), (0, 1 << 20), ((1 << 20) - 1, (1 << 20) + 5)])
+def test_free_space_rejects_coordinates_outside_packed_range(bounds):
+    container = Block(l=10, w=10, h=10)
+    with pytest.raises(ValueError):
+        FreeSpace(Space(*bounds, 0, 10, 0, 10, container))
+
+
+def test_crop_rejects_aabb_outside_packed_range():
+    container = Block(l=10, w=10, h=10)
+    with pytest.raises(ValueError):
+        container.free_space.crop(Aabb(0, 1 << 20, 0, 5, 0, 5), container)
+
+
+@pytest.mark.parametrize("join_candidates", [clp.base._JOIN_CANDIDATES, 50])
+@pytest.mark.parametrize("min_fr, max_bl", [(0.98, 1000), (0.9, 300), (0.8, 137), (0.7, 61)])
+def test_general_blocks_match_reference(min_fr, max_bl, join_candidates, monkeypatch):
+    # A small join budget splits each pass into many slices of P, so max_bl is reached mid-pass
+    monkeypatch.setattr(clp.base, "_JOIN_CANDIDATES", join_candidates)
+    for seed in range(8):
+        rnd = random.Random(seed)
+        # Few distinct sizes, so many pairs of blocks join above min_fr
+        types = [Boxtype(i, rnd.choice((30, 40, 60)), rnd.choice((20, 40)), rnd.choice((25, 50)),
+                         weight=rnd.randint(1, 20)) for i in range(rnd.randint(1, 4))]
+        items = Itemdict({t: rnd.randint(1, 6) for t in types})
+        cont = Block(l=rnd.choice((120, 240)), w=120, h=100)
+        expected = reference_general_blocks(items, cont, min_fr, max_bl)
+        assert blocks(BlockList(items, "general_blocks", cont, min_fr, max_bl)) == blocks(expected)
+
+
+def test_general_blocks_without_items():
+    assert BlockList({}, "general_blocks", Block(l=587, w=233, h=220)) == []